@@ -2,17 +2,84 @@
 import os
 import json
 import urllib.parse
+import hashlib
 import time # Added for debugging delays
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify, Response, stream_with_context
+from werkzeug.middleware.proxy_fix import ProxyFix
 from catalyst_client import CatalystClient, CatalystClientError
+from compression import compress_response
+from result_store import create_result_store, CLAIMED, COMPLETED, CONFLICT
 import uuid # For generating unique IDs
-from mcp_mappings import RESOURCES, TOOLS, PROMPTS, get_resource_methods, get_tool_parameters, get_prompt_steps
+from mcp_mappings import current_mappings
 
 app = Flask(__name__)
 
+# Number of reverse proxies (Heroku router, nginx, ...) in front of the server whose X-Forwarded-For
+# header is trusted; needed so per-client limits see the real client address instead of the proxy's
+MCP_TRUSTED_PROXY_HOPS = int(os.getenv("MCP_TRUSTED_PROXY_HOPS", "0"))
+if MCP_TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=MCP_TRUSTED_PROXY_HOPS)
+
 # In-memory store for active SSE sessions and their associated POST endpoints
 active_sessions = {}
 
+# SSE session limits; sessions with no client POSTs for MCP_SESSION_IDLE_TIMEOUT seconds are reaped
+MCP_SESSION_IDLE_TIMEOUT = float(os.getenv("MCP_SESSION_IDLE_TIMEOUT", "300"))
+MCP_MAX_SESSIONS = int(os.getenv("MCP_MAX_SESSIONS", "1000"))
+MCP_MAX_SESSIONS_PER_CLIENT = int(os.getenv("MCP_MAX_SESSIONS_PER_CLIENT", "20"))
+MCP_MAX_IN_FLIGHT_PER_SESSION = int(os.getenv("MCP_MAX_IN_FLIGHT_PER_SESSION", "8"))
+
+class SseSession:
+    """Per-session state kept in active_sessions; slotted so idle sessions stay small."""
+    __slots__ = ("client", "created_at", "last_seen")
+
+    def __init__(self, client):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_seen = self.created_at
+
+# Cancellation events for MCP requests currently being processed through an SSE session, keyed by
+# (session_id, request_id). Sessionless requests are not registered: their ids are not unique across
+# clients, so they cannot be cancelled safely and rely on their deadline alone.
+in_flight_requests = {}
+
+# Limits for catalyst_batch_tool fan-out
+MCP_BATCH_MAX_REQUESTS = int(os.getenv("MCP_BATCH_MAX_REQUESTS", "50"))
+MCP_BATCH_MAX_CONCURRENCY = int(os.getenv("MCP_BATCH_MAX_CONCURRENCY", "8"))
+BATCH_HTTP_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+# Results of tools/call requests sent with params._meta.idempotencyKey
+result_store = create_result_store()
+# Seconds between cancellation checks while waiting on another execution of the same idempotency key
+IDEMPOTENCY_WAIT_SLICE = 0.5
+
+# Default and maximum per-request deadline (seconds); clients may ask for less via params._meta.timeoutMs
+MCP_REQUEST_TIMEOUT = float(os.getenv("MCP_REQUEST_TIMEOUT", "110"))
+
+# Optional worker warmup (see gunicorn.conf.py); MCP_WARMUP_RESOURCES lists resource types to pre-fetch
+MCP_WARMUP = os.getenv("MCP_WARMUP", "false").lower() in ("1", "true", "yes")
+MCP_WARMUP_TIMEOUT = float(os.getenv("MCP_WARMUP_TIMEOUT", "20"))
+MCP_WARMUP_RESOURCES = [name.strip() for name in os.getenv("MCP_WARMUP_RESOURCES", "").split(",") if name.strip()]
+
+# Resource lists pre-fetched by warmup, keyed by (resource_name, endpoint) -> (fetched_at, response).
+# resources/read serves them for MCP_WARMUP_CACHE_TTL seconds so the first reads skip the cold inventory pull.
+MCP_WARMUP_CACHE_TTL = float(os.getenv("MCP_WARMUP_CACHE_TTL", "60"))
+warmup_resource_cache = {}
+
+# cold -> warming -> ready, or degraded if warmup failed; always ready without MCP_WARMUP.
+# A degraded worker reports not ready and /ready retries warmup at most every MCP_WARMUP_RETRY_INTERVAL seconds.
+MCP_WARMUP_RETRY_INTERVAL = float(os.getenv("MCP_WARMUP_RETRY_INTERVAL", "30"))
+warmup_state = {"status": "cold" if MCP_WARMUP else "ready"}
+_warmup_lock = threading.Lock()
+_last_warmup_attempt = None
+
+# --- Response compression (negotiated via Accept-Encoding) ---
+@app.after_request
+def compress_json_responses(response):
+    return compress_response(request, response)
+
 # --- Minimal SSE Test Endpoint ---
 @app.route("/mcp/test_sse", methods=["GET"])
 def handle_test_sse():
@@ -27,9 +94,131 @@ def handle_test_sse():
     return Response(stream_with_context(generate_test_events()), mimetype="text/event-stream")
 
 # --- Helper function to process MCP requests (reused) ---
-def process_mcp_logic(method, params, request_id):
+def _request_deadline(params):
+    """Returns the absolute deadline for a request, using the client-supplied timeout if it is shorter."""
+    timeout = MCP_REQUEST_TIMEOUT
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    if isinstance(meta, dict) and isinstance(meta.get("timeoutMs"), (int, float)) and meta["timeoutMs"] > 0:
+        timeout = min(timeout, meta["timeoutMs"] / 1000.0)
+    return time.monotonic() + timeout
+
+def reap_idle_sessions():
+    """Drops sessions whose stream stopped without cleaning up after itself."""
+    cutoff = time.monotonic() - MCP_SESSION_IDLE_TIMEOUT
+    for session_id, session in list(active_sessions.items()):
+        if session.last_seen < cutoff:
+            app.logger.info(f"Reaping idle SSE session {session_id} (client {session.client})")
+            active_sessions.pop(session_id, None)
+            cancel_session_requests(session_id)
+
+def cancel_session_requests(session_id):
+    """Signals cancellation to every in-flight request belonging to an SSE session."""
+    for (owner, request_id), cancel_event in list(in_flight_requests.items()):
+        if owner == session_id:
+            app.logger.info(f"Cancelling in-flight request {request_id} for session {session_id}")
+            cancel_event.set()
+
+def process_mcp_logic(method, params, request_id, session_id=None):
     app.logger.info(f"Processing MCP Logic: method={method}, params={params}, id={request_id}")
-    
+
+    if method == "notifications/cancelled":
+        cancelled_id = params.get("requestId") if isinstance(params, dict) else None
+        cancel_event = in_flight_requests.get((session_id, cancelled_id)) if session_id is not None else None
+        if cancel_event is not None:
+            app.logger.info(f"Cancelling request {cancelled_id}: {params.get('reason')}")
+            cancel_event.set()
+        return {"jsonrpc": "2.0", "result": None, "id": request_id}
+
+    key = (session_id, request_id)
+    client_options = {
+        "deadline": _request_deadline(params),
+        "cancel_event": threading.Event()
+    }
+    if session_id is not None and request_id is not None:
+        in_flight_requests[key] = client_options["cancel_event"]
+    try:
+        idempotency_key = _idempotency_key(method, params)
+        if idempotency_key:
+            response_payload = _process_idempotent_call(idempotency_key, params, request_id, client_options, current_mappings())
+        else:
+            response_payload = _process_mcp_method(method, params, request_id, client_options, current_mappings())
+    finally:
+        if in_flight_requests.get(key) is client_options["cancel_event"]:
+            del in_flight_requests[key]
+
+    # The work stopped early; report why instead of the generic upstream failure
+    if client_options["cancel_event"].is_set():
+        return {"jsonrpc": "2.0", "error": {"code": -32800, "message": "Request cancelled"}, "id": request_id}
+    if response_payload and "error" in response_payload and time.monotonic() >= client_options["deadline"]:
+        return {"jsonrpc": "2.0", "error": {"code": 1003, "message": "Request deadline exceeded"}, "id": request_id}
+    return response_payload
+
+def _idempotency_key(method, params):
+    if method != "tools/call" or not isinstance(params, dict) or not isinstance(params.get("_meta"), dict):
+        return None
+    key = params["_meta"].get("idempotencyKey")
+    return key if isinstance(key, str) and key else None
+
+def _process_idempotent_call(idempotency_key, params, request_id, client_options, mappings):
+    """Runs a tools/call at most once per idempotency key; retries attach to the original execution."""
+    fingerprint = hashlib.sha256(
+        json.dumps({"toolId": params.get("toolId"), "inputs": params.get("inputs")}, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    while True:
+        state, result = result_store.claim(idempotency_key, fingerprint)
+        if state == CLAIMED:
+            try:
+                response_payload = _process_mcp_method("tools/call", params, request_id, client_options, mappings)
+            except Exception:
+                result_store.release(idempotency_key)
+                raise
+            # Only successful executions are kept; a failed or cancelled one may be retried
+            if response_payload and "result" in response_payload and not client_options["cancel_event"].is_set():
+                result_store.complete(idempotency_key, response_payload["result"])
+            else:
+                result_store.release(idempotency_key)
+            return response_payload
+        if state == COMPLETED:
+            app.logger.info(f"Returning stored result for idempotency key {idempotency_key}")
+            return {"jsonrpc": "2.0", "result": result, "id": request_id}
+        if state == CONFLICT:
+            return {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: idempotency key was already used with different inputs"}, "id": request_id}
+        # Another request with this key is running; wait for it, then claim again to pick up its outcome.
+        # Wait in short slices so that cancelling this request frees it promptly.
+        app.logger.info(f"Waiting for in-flight execution of idempotency key {idempotency_key}")
+        while True:
+            if client_options["cancel_event"].is_set():
+                return {"jsonrpc": "2.0", "error": {"code": -32800, "message": "Request cancelled"}, "id": request_id}
+            remaining = client_options["deadline"] - time.monotonic()
+            if remaining <= 0:
+                return {"jsonrpc": "2.0", "error": {"code": 1003, "message": "Request deadline exceeded while waiting for the original execution"}, "id": request_id}
+            if result_store.wait(idempotency_key, min(IDEMPOTENCY_WAIT_SLICE, remaining)):
+                break
+
+def _run_batch_request(client, index, sub_request):
+    """Runs one catalyst_batch_tool sub-request; failures are reported per item rather than raised."""
+    http_method = sub_request["http_method"].upper()
+    endpoint_path = sub_request["endpoint_path"]
+    item = {"index": index, "http_method": http_method, "endpoint_path": endpoint_path}
+    if sub_request.get("device_id") is not None:
+        item["device_id"] = sub_request["device_id"]
+    try:
+        item["status_code"], item["response_body"] = client.request_with_status(
+            http_method,
+            endpoint_path,
+            params=sub_request.get("request_params"),
+            data=sub_request.get("request_body")
+        )
+    except CatalystClientError as e:
+        item["status_code"] = e.status_code
+        item["error"] = str(e)
+    except Exception as e:
+        app.logger.error(f"Unexpected error in batch sub-request {index}: {e}", exc_info=True)
+        item["status_code"] = None
+        item["error"] = f"Server error: {e}"
+    return item
+
+def _process_mcp_method(method, params, request_id, client_options, mappings):
     if method == "initialize":
         return {
             "jsonrpc": "2.0",
@@ -59,15 +248,7 @@ def process_mcp_logic(method, params, request_id):
             "jsonrpc": "2.0",
             "id": request_id,
             "result": {
-                "tools": [
-                    {
-                        "id": tool_id,
-                        "name": tool_info["name"],
-                        "description": tool_info["description"],
-                        "parameters": tool_info["parameters"]
-                    }
-                    for tool_id, tool_info in TOOLS.items()
-                ]
+                "tools": mappings.tools_catalog
             }
         }
 
@@ -75,7 +256,7 @@ def process_mcp_logic(method, params, request_id):
         tool_id = params.get("toolId")
         inputs = params.get("inputs")
 
-        if tool_id not in TOOLS:
+        if tool_id not in mappings.tools:
             return {"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Tool {tool_id} not found"}, "id": request_id}
 
         if not inputs or not isinstance(inputs, dict):
@@ -91,7 +272,7 @@ def process_mcp_logic(method, params, request_id):
                 return {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: http_method and endpoint_path are required in inputs"}, "id": request_id}
             
             try:
-                client = CatalystClient()
+                client = CatalystClient(**client_options)
                 app.logger.info(f"Executing Catalyst API Tool: {http_method} {endpoint_path}")
                 api_response_data = client.make_request(
                     method=http_method.upper(),
@@ -111,6 +292,50 @@ def process_mcp_logic(method, params, request_id):
                 app.logger.error(f"Unexpected error during tools/call: {e}", exc_info=True)
                 return {"jsonrpc": "2.0", "error": {"code": -32000, "message": "Server error", "data": str(e)}, "id": request_id}
         
+        elif tool_id == "catalyst_batch_tool":
+            sub_requests = inputs.get("requests")
+            allow_writes = inputs.get("allow_writes", False)
+
+            if not isinstance(sub_requests, list) or not sub_requests:
+                return {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: requests must be a non-empty array"}, "id": request_id}
+            if len(sub_requests) > MCP_BATCH_MAX_REQUESTS:
+                return {"jsonrpc": "2.0", "error": {"code": -32602, "message": f"Invalid params: at most {MCP_BATCH_MAX_REQUESTS} requests are allowed"}, "id": request_id}
+            for index, sub_request in enumerate(sub_requests):
+                if not isinstance(sub_request, dict) or not isinstance(sub_request.get("http_method"), str) or not isinstance(sub_request.get("endpoint_path"), str):
+                    return {"jsonrpc": "2.0", "error": {"code": -32602, "message": f"Invalid params: requests[{index}] requires http_method and endpoint_path"}, "id": request_id}
+                if sub_request["http_method"].upper() not in BATCH_HTTP_METHODS:
+                    return {"jsonrpc": "2.0", "error": {"code": -32602, "message": f"Invalid params: requests[{index}] uses unsupported method {sub_request['http_method']}"}, "id": request_id}
+                if sub_request.get("device_id") is not None and not isinstance(sub_request["device_id"], str):
+                    return {"jsonrpc": "2.0", "error": {"code": -32602, "message": f"Invalid params: requests[{index}] device_id must be a string"}, "id": request_id}
+                if sub_request["http_method"].upper() != "GET" and not allow_writes:
+                    return {"jsonrpc": "2.0", "error": {"code": -32602, "message": f"Invalid params: requests[{index}] uses {sub_request['http_method']} but allow_writes is not set"}, "id": request_id}
+
+            max_concurrency = inputs.get("max_concurrency") or MCP_BATCH_MAX_CONCURRENCY
+            if not isinstance(max_concurrency, int):
+                return {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: max_concurrency must be an integer"}, "id": request_id}
+            max_concurrency = max(1, min(max_concurrency, MCP_BATCH_MAX_CONCURRENCY, len(sub_requests)))
+
+            try:
+                # One authenticated client shared by all sub-requests
+                client = CatalystClient(**client_options)
+                app.logger.info(f"Executing Catalyst batch of {len(sub_requests)} requests with concurrency {max_concurrency}")
+                with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                    results = list(executor.map(lambda args: _run_batch_request(client, *args), enumerate(sub_requests)))
+                tool_result = {"results": results}
+                if inputs.get("merge_by_device_id"):
+                    merged = {}
+                    for item in results:
+                        if "device_id" in item:
+                            merged.setdefault(item["device_id"], []).append(item)
+                    tool_result["by_device_id"] = merged
+                return {"jsonrpc": "2.0", "result": {"outputs": tool_result}, "id": request_id}
+            except CatalystClientError as e:
+                app.logger.error(f"Catalyst Client Error during batch tools/call: {e}")
+                return {"jsonrpc": "2.0", "error": {"code": 1001, "message": "Catalyst API request failed", "data": str(e)}, "id": request_id}
+            except Exception as e:
+                app.logger.error(f"Unexpected error during batch tools/call: {e}", exc_info=True)
+                return {"jsonrpc": "2.0", "error": {"code": -32000, "message": "Server error", "data": str(e)}, "id": request_id}
+
         elif tool_id == "deploy_template":
             template_id = inputs.get("templateId")
             device_ids = inputs.get("deviceIds")
@@ -119,7 +344,7 @@ def process_mcp_logic(method, params, request_id):
                 return {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: templateId and deviceIds are required"}, "id": request_id}
             
             try:
-                client = CatalystClient()
+                client = CatalystClient(**client_options)
                 # First verify template exists
                 template = client.make_request("GET", f"/dna/intent/api/v1/template-programmer/template/{template_id}")
                 if not template:
@@ -144,7 +369,7 @@ def process_mcp_logic(method, params, request_id):
                 return {"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: deviceInfo and siteId are required"}, "id": request_id}
             
             try:
-                client = CatalystClient()
+                client = CatalystClient(**client_options)
                 # First verify site exists
                 site = client.make_request("GET", f"/dna/intent/api/v1/site/{site_id}")
                 if not site:
@@ -161,28 +386,17 @@ def process_mcp_logic(method, params, request_id):
                 app.logger.error(f"Catalyst Client Error during device provisioning: {e}")
                 return {"jsonrpc": "2.0", "error": {"code": 1001, "message": "Device provisioning failed", "data": str(e)}, "id": request_id}
 
+        else:
+            # Declared in the mappings file but no handler exists in this server version
+            return {"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Tool {tool_id} not implemented"}, "id": request_id}
+
     elif method == "resources/list":
         # Return all available resources with a 'uri' field
         return {
             "jsonrpc": "2.0",
             "id": request_id,
             "result": {
-                "resources": [
-                    {
-                        "id": resource_id,
-                        "name": resource_info["name"],
-                        "description": resource_info["description"],
-                        "uri": f"/mcp/resource/{resource_id}",
-                        "methods": {
-                            method_name: {
-                                "name": method_info["name"],
-                                "description": method_info["description"]
-                            }
-                            for method_name, method_info in resource_info["methods"].items()
-                        }
-                    }
-                    for resource_id, resource_info in RESOURCES.items()
-                ]
+                "resources": mappings.resources_catalog
             }
         }
 
@@ -191,24 +405,27 @@ def process_mcp_logic(method, params, request_id):
         resource_id = params.get("resourceId")
         uri = params.get("uri")
         if uri and not resource_name:
-            parts = uri.strip("/").split("/")
-            if len(parts) == 3 and parts[0] == "mcp" and parts[1] == "resource":
-                resource_name = parts[2]
-        if not resource_name or resource_name not in RESOURCES:
+            resource_name, uri_resource_id = mappings.parse_resource_uri(uri)
+            resource_id = resource_id or uri_resource_id
+        if not resource_name or resource_name not in mappings.resources:
             return {"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Resource {resource_name} not found"}, "id": request_id}
         try:
-            client = CatalystClient()
-            resource = RESOURCES[resource_name]
+            client = CatalystClient(**client_options)
+            resource = mappings.resources[resource_name]
             if resource_id:
                 # Read a specific resource
                 read_method = resource["methods"]["read"]
-                endpoint = read_method["endpoint"].format(**{f"{resource_name[:-1]}Id": resource_id})
+                endpoint = mappings.resource_readers[resource_name].build(resource_id)
                 response = client.make_request(method=read_method["http_method"], endpoint_path=endpoint)
                 return {"jsonrpc": "2.0", "result": {"item": response}, "id": request_id}
             else:
                 # Read all resources of this type
                 list_method = resource["methods"]["list"]
-                response = client.make_request(method=list_method["http_method"], endpoint_path=list_method["endpoint"])
+                cached = warmup_resource_cache.get((resource_name, list_method["endpoint"]))
+                if cached and time.monotonic() - cached[0] < MCP_WARMUP_CACHE_TTL:
+                    response = cached[1]
+                else:
+                    response = client.make_request(method=list_method["http_method"], endpoint_path=list_method["endpoint"])
                 # Transform the response into the expected format
                 contents = [
                     {
@@ -227,23 +444,16 @@ def process_mcp_logic(method, params, request_id):
             "jsonrpc": "2.0",
             "id": request_id,
             "result": {
-                "prompts": [
-                    {
-                        "id": prompt_id,
-                        "name": prompt_info["name"],
-                        "description": prompt_info["description"]
-                    }
-                    for prompt_id, prompt_info in PROMPTS.items()
-                ]
+                "prompts": mappings.prompts_catalog
             }
         }
 
     elif method == "prompts/get":
         prompt_id = params.get("promptId")
-        if not prompt_id or prompt_id not in PROMPTS:
+        if not prompt_id or prompt_id not in mappings.prompts:
             return {"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Prompt {prompt_id} not found"}, "id": request_id}
         
-        prompt = PROMPTS[prompt_id]
+        prompt = mappings.prompts[prompt_id]
         return {
             "jsonrpc": "2.0",
             "id": request_id,
@@ -277,6 +487,7 @@ def handle_sse_session_handshake():
                 app.logger.info(f"Extracted session ID from endpoint URL: {session_id}")
                 
                 if session_id in active_sessions:
+                    active_sessions[session_id].last_seen = time.monotonic()
                     method = data.get("method")
                     params = data.get("params", {})
                     request_id = data.get("id")
@@ -286,8 +497,13 @@ def handle_sse_session_handshake():
                     if method == "initialized":
                         app.logger.info(f"Received initialized notification for session {session_id}")
                         return jsonify({"jsonrpc": "2.0", "result": None, "id": request_id})
+
+                    in_flight = sum(1 for owner, _ in list(in_flight_requests) if owner == session_id)
+                    if method != "notifications/cancelled" and in_flight >= MCP_MAX_IN_FLIGHT_PER_SESSION:
+                        app.logger.warning(f"Session {session_id} has {in_flight} requests in flight, rejecting {request_id}")
+                        return jsonify({"jsonrpc": "2.0", "error": {"code": -32003, "message": "Too many requests in flight for this session"}, "id": request_id}), 429
                     
-                    response_payload = process_mcp_logic(method, params, request_id)
+                    response_payload = process_mcp_logic(method, params, request_id, session_id=session_id)
                     app.logger.info(f"Sending response for session {session_id}: {response_payload}")
                     
                     # Send response as SSE event
@@ -340,11 +556,18 @@ def handle_sse_session_handshake():
             return jsonify({"jsonrpc": "2.0", "error": {"code": -32000, "message": f"Server error: {str(e)}"}, "id": None}), 500
 
     # Handle GET request for SSE connection
+    reap_idle_sessions()
+    client = request.remote_addr
+    if len(active_sessions) >= MCP_MAX_SESSIONS:
+        app.logger.warning(f"Rejecting SSE session for {client}: {len(active_sessions)} sessions active")
+        return jsonify({"jsonrpc": "2.0", "error": {"code": -32003, "message": "Too many active sessions"}, "id": None}), 503
+    if sum(1 for session in list(active_sessions.values()) if session.client == client) >= MCP_MAX_SESSIONS_PER_CLIENT:
+        app.logger.warning(f"Rejecting SSE session for {client}: per-client session limit reached")
+        return jsonify({"jsonrpc": "2.0", "error": {"code": -32003, "message": "Too many active sessions for this client"}, "id": None}), 429
+
     session_id = str(uuid.uuid4())
     session_endpoint = f"/mcp/session/{session_id}"
-    active_sessions[session_id] = {
-        "created_at": time.time()
-    }
+    active_sessions[session_id] = SseSession(client)
     app.logger.info(f"New SSE session created: {session_id}")
 
     def generate_handshake_event():
@@ -354,18 +577,28 @@ def handle_sse_session_handshake():
         endpoint_event_data = {
             "endpoint": f"http://localhost:5001/mcp/session/{session_id}"
         }
-        # Send the event with proper formatting
-        yield f"event: endpoint\ndata: {json.dumps(endpoint_event_data)}\n\n"
-        
-        # Keep stream alive with periodic pings
         try:
+            # Send the event with proper formatting; inside the try so that a client that
+            # disconnects right after the handshake still gets its session cleaned up
+            yield f"event: endpoint\ndata: {json.dumps(endpoint_event_data)}\n\n"
+
+            # Keep stream alive with periodic pings
             while True:
+                session = active_sessions.get(session_id)
+                if session is None:
+                    app.logger.info(f"SSE session {session_id} was reaped, closing stream.")
+                    break
+                # Pings succeed even on half-open connections, so only client POSTs count as activity
+                if time.monotonic() - session.last_seen > MCP_SESSION_IDLE_TIMEOUT:
+                    app.logger.info(f"SSE session {session_id} idle for over {MCP_SESSION_IDLE_TIMEOUT}s, closing stream.")
+                    break
                 app.logger.debug(f"SSE session {session_id}: sending keepalive ping")
                 yield ": keepalive\n\n"
                 time.sleep(15) # Send a comment every 15 seconds
         except GeneratorExit:
             app.logger.info(f"SSE client for session {session_id} disconnected.")
         finally:
+            cancel_session_requests(session_id)
             if session_id in active_sessions:
                 del active_sessions[session_id]
                 app.logger.info(f"SSE session {session_id} cleaned up from active_sessions.")
@@ -400,6 +633,50 @@ def handle_malformed_url(session_config):
     
     return jsonify({"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": None}), 400
 
+# --- Worker warmup and readiness ---
+def warmup_worker():
+    """Authenticates, opens a pooled Catalyst connection and loads the MCP catalogs before traffic arrives."""
+    global _last_warmup_attempt
+    if not _warmup_lock.acquire(blocking=False):
+        return  # another thread is already warming this worker
+    try:
+        _run_warmup()
+    finally:
+        _last_warmup_attempt = time.monotonic()
+        _warmup_lock.release()
+
+def _run_warmup():
+    warmup_state["status"] = "warming"
+    warmup_state.pop("error", None)
+    started = time.monotonic()
+    try:
+        mappings = current_mappings()
+        client = CatalystClient(deadline=started + MCP_WARMUP_TIMEOUT)
+        for resource_name in MCP_WARMUP_RESOURCES:
+            if resource_name not in mappings.resources:
+                app.logger.warning(f"Warmup: unknown resource {resource_name}, skipping")
+                continue
+            list_method = mappings.resources[resource_name]["methods"]["list"]
+            response = client.make_request(method=list_method["http_method"], endpoint_path=list_method["endpoint"])
+            warmup_resource_cache[(resource_name, list_method["endpoint"])] = (time.monotonic(), response)
+        warmup_state.update(status="ready", duration=round(time.monotonic() - started, 3))
+        app.logger.info(f"Worker warmup finished in {warmup_state['duration']}s")
+    except Exception as e:
+        # Reported as not ready; the next /ready probe after MCP_WARMUP_RETRY_INTERVAL tries again
+        app.logger.error(f"Worker warmup failed: {e}", exc_info=not isinstance(e, CatalystClientError))
+        warmup_state.update(status="degraded", duration=round(time.monotonic() - started, 3), error=str(e))
+
+@app.route("/ready", methods=["GET"])
+def handle_readiness():
+    # Fallback for servers that did not run the warmup hook: the first probe warms the worker.
+    # A worker whose warmup failed is retried here so it can become ready once Catalyst Center is back.
+    if warmup_state["status"] == "cold" or (
+        warmup_state["status"] == "degraded" and time.monotonic() - _last_warmup_attempt >= MCP_WARMUP_RETRY_INTERVAL
+    ):
+        warmup_worker()
+    status_code = 200 if warmup_state["status"] == "ready" else 503
+    return jsonify(warmup_state), status_code
+
 # --- OLD/Existing Endpoints (kept for reference or potential backward compatibility) ---
 @app.route("/")
 def hello_world():
@@ -485,5 +762,7 @@ if __name__ == "__main__":
     print("Starting Flask development server...")
     print(f"CATALYST_BASE_URL: {os.getenv('CATALYST_BASE_URL')}")
     print(f"CATALYST_USERNAME: {os.getenv('CATALYST_USERNAME')}")
+    if MCP_WARMUP:
+        warmup_worker()
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5001)), debug=True)
 
@@ -2,9 +2,21 @@
 import requests
 import json
 import os
+import threading
+import time
 
 # Custom exception for Catalyst Client errors
 class CatalystClientError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code # HTTP status returned by Catalyst Center, if any
+
+# Raised when the caller cancelled the work this client was doing on its behalf
+class CatalystRequestCancelled(CatalystClientError):
+    pass
+
+# Raised when the caller's deadline passes before a Catalyst call can be made
+class CatalystDeadlineExceeded(CatalystClientError):
     pass
 
 # Hardcoded credentials for Catalyst Center
@@ -12,26 +24,76 @@ CATALYST_BASE_URL = ""
 CATALYST_USERNAME = ""
 CATALYST_PASSWORD = ""
 
+# Upper bound (seconds) for a single HTTP call to Catalyst Center
+CATALYST_REQUEST_TIMEOUT = float(os.getenv("CATALYST_REQUEST_TIMEOUT", "30"))
+
+# Seconds an auth token is reused before fetching a new one (Catalyst Center tokens last 60 minutes)
+CATALYST_TOKEN_TTL = float(os.getenv("CATALYST_TOKEN_TTL", "3000"))
+
+# Per-process HTTP session so TLS connections to Catalyst Center are pooled and reused across requests
+_http = requests.Session()
+
+# Per-process auth token shared by all CatalystClient instances
+_token_cache = {"token": None, "fetched_at": 0.0}
+# Re-entrant: _refresh_token holds it across _authenticate, which also stores the new token under it
+_token_lock = threading.RLock()
+
+def _cached_token():
+    with _token_lock:
+        if _token_cache["token"] and time.monotonic() - _token_cache["fetched_at"] < CATALYST_TOKEN_TTL:
+            return _token_cache["token"]
+    return None
+
 class CatalystClient:
-    def __init__(self):
+    def __init__(self, deadline=None, cancel_event=None):
         self.base_url = CATALYST_BASE_URL
         self.username = CATALYST_USERNAME
         self.password = CATALYST_PASSWORD
         self.token = None
         self.last_response_status_code = None # To store the status code for 204 checks
-        self._authenticate()
+        # Absolute time.monotonic() value after which no new upstream call is started
+        self.deadline = deadline
+        # threading.Event set by the server when the MCP request is cancelled
+        self.cancel_event = cancel_event
+        self.token = _cached_token()
+        if not self.token:
+            self._refresh_token(None)
+
+    def _request_timeout(self):
+        """Returns the timeout for the next upstream call, honouring cancellation and the deadline."""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CatalystRequestCancelled("Request was cancelled by the client")
+        if self.deadline is None:
+            return CATALYST_REQUEST_TIMEOUT
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise CatalystDeadlineExceeded("Request deadline exceeded before calling Catalyst Center")
+        return min(CATALYST_REQUEST_TIMEOUT, remaining)
+
+    def _refresh_token(self, stale_token):
+        """Replaces stale_token with a fresh one. Only one thread authenticates at a time; the others
+        wait and reuse the token it fetched instead of sending their own auth requests."""
+        with _token_lock:
+            cached = _cached_token()
+            if cached and cached != stale_token:
+                self.token = cached
+                return
+            self._authenticate()
 
     def _authenticate(self):
         """Authenticates with the Catalyst Center and stores the token."""
         auth_url = f"{self.base_url}/dna/system/api/v1/auth/token"
         try:
             print(f"Attempting authentication to: {auth_url}")
-            response = requests.post(auth_url, auth=(self.username, self.password), verify=False) 
+            response = _http.post(auth_url, auth=(self.username, self.password), verify=False, timeout=self._request_timeout())
             response.raise_for_status()
             self.token = response.json().get("Token")
             if not self.token:
                 print("Authentication failed: Token not received.")
                 raise CatalystClientError("Authentication failed: Token not received.")
+            with _token_lock:
+                _token_cache["token"] = self.token
+                _token_cache["fetched_at"] = time.monotonic()
             print("Successfully authenticated with Catalyst Center.")
         except requests.exceptions.RequestException as e:
             print(f"Error during authentication: {e}")
@@ -40,7 +102,7 @@ class CatalystClient:
     def _get_headers(self):
         if not self.token:
             print("Token is missing, attempting to re-authenticate...")
-            self._authenticate()
+            self._refresh_token(None)
         return {
             "X-Auth-Token": self.token,
             "Content-Type": "application/json",
@@ -49,41 +111,56 @@ class CatalystClient:
 
     def make_request(self, method, endpoint_path, params=None, data=None):
         """Makes a generic request to the Catalyst Center API."""
+        self.last_response_status_code = None
+        try:
+            self.last_response_status_code, response_data = self.request_with_status(method, endpoint_path, params=params, data=data)
+        except CatalystClientError as e:
+            self.last_response_status_code = e.status_code
+            raise
+        return response_data
+
+    def request_with_status(self, method, endpoint_path, params=None, data=None, retry_auth=True):
+        """Like make_request, but returns (status_code, data) without touching shared client state.
+        Safe to call from several threads sharing one authenticated client.
+        A 401 caused by an expired cached token is retried once with a fresh token."""
         if not endpoint_path.startswith("/"):
             endpoint_path = "/" + endpoint_path
         
         url = f"{self.base_url}{endpoint_path}"
         headers = self._get_headers()
-        self.last_response_status_code = None
+        timeout = self._request_timeout()
 
         print(f"Making {method.upper()} request to {url} with params={params}, data={data}")
 
         try:
             if method.upper() == "GET":
-                response = requests.get(url, headers=headers, params=params, verify=False)
+                response = _http.get(url, headers=headers, params=params, verify=False, timeout=timeout)
             elif method.upper() == "POST":
-                response = requests.post(url, headers=headers, params=params, json=data, verify=False)
+                response = _http.post(url, headers=headers, params=params, json=data, verify=False, timeout=timeout)
             elif method.upper() == "PUT":
-                response = requests.put(url, headers=headers, params=params, json=data, verify=False)
+                response = _http.put(url, headers=headers, params=params, json=data, verify=False, timeout=timeout)
             elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=headers, params=params, verify=False)
+                response = _http.delete(url, headers=headers, params=params, verify=False, timeout=timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
-            self.last_response_status_code = response.status_code
             print(f"Response status code: {response.status_code}")
             response.raise_for_status()
             
             if response.status_code == 204:
                 print("Received 204 No Content.")
-                return None 
+                return response.status_code, None
             
             if not response.content:
                 print("Response content is empty.")
-                return None
+                return response.status_code, None
                 
-            return response.json()
+            return response.status_code, response.json()
         except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 401 and retry_auth:
+                print("Received 401, refreshing the auth token and retrying once...")
+                self._refresh_token(headers["X-Auth-Token"])
+                return self.request_with_status(method, endpoint_path, params=params, data=data, retry_auth=False)
             error_details = e.response.text
             try:
                 error_json = e.response.json()
@@ -92,7 +169,12 @@ class CatalystClient:
             except json.JSONDecodeError:
                 pass 
             print(f"HTTP error occurred: {e.response.status_code} - {e.response.reason}. Details: {error_details}")
-            raise CatalystClientError(f"Catalyst API request failed: {e.response.status_code} - {error_details}") from e
+            raise CatalystClientError(f"Catalyst API request failed: {e.response.status_code} - {error_details}", status_code=e.response.status_code) from e
+        except requests.exceptions.Timeout as e:
+            print(f"Request timed out after {timeout:.1f}s: {e}")
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                raise CatalystDeadlineExceeded(f"Request deadline exceeded while calling Catalyst Center: {e}") from e
+            raise CatalystClientError(f"Catalyst API request timed out: {e}") from e
         except requests.exceptions.RequestException as e:
             print(f"Request exception occurred: {e}")
             raise CatalystClientError(f"Catalyst API request failed: {e}") from e
@@ -0,0 +1,82 @@
+"""
+Response compression for the MCP server.
+Negotiates gzip/deflate (and zstd when the zstandard package is installed) from Accept-Encoding
+and compresses JSON responses and SSE event streams.
+"""
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+# Buffered responses smaller than this (bytes) are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("MCP_COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("MCP_COMPRESSION_LEVEL", "6"))
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/event-stream")
+
+# Preferred encodings first; used to break ties between equal Accept-Encoding qualities
+SUPPORTED_ENCODINGS = (["zstd"] if zstandard else []) + ["gzip", "deflate"]
+
+class _Compressor:
+    """Wraps a streaming compressor behind a common compress/flush/finish interface."""
+
+    def __init__(self, encoding):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=min(COMPRESSION_LEVEL, 19)).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            wbits = 31 if encoding == "gzip" else 15  # 31 = gzip container, 15 = zlib ("deflate" in HTTP)
+            self._obj = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, wbits)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        """Emits everything compressed so far so the client can decode it immediately."""
+        return self._obj.flush(self._flush_mode)
+
+    def finish(self):
+        return self._obj.flush()
+
+def _compressed_stream(chunks, compressor):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        # Propagate client disconnects to the wrapped generator (e.g. SSE session cleanup)
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+def compress_response(request, response):
+    """Compresses a Flask response in place if the client accepts a supported encoding."""
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    if response.status_code in (204, 304) or "Content-Encoding" in response.headers:
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compressed_stream(response.response, _Compressor(encoding))
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        compressor = _Compressor(encoding)
+        response.set_data(compressor.compress(body) + compressor.finish())
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,9 @@
+# Gunicorn picks this file up automatically when started from the project directory.
+# Command-line options (Procfile, start_server.sh) still take precedence.
+
+def post_worker_init(worker):
+    """Warms each worker before it starts accepting connections (enabled with MCP_WARMUP=true)."""
+    from app import MCP_WARMUP, warmup_worker
+    if MCP_WARMUP:
+        worker.log.info("Warming up worker before accepting traffic")
+        warmup_worker()
@@ -1,174 +1,195 @@
 """
 MCP (Model Context Protocol) mappings for Catalyst Center APIs.
-This file defines the resources, tools, and prompts available through the MCP interface.
+The resources, tools, and prompts available through the MCP interface are declared in
+mcp_mappings.json (or the file named by MCP_MAPPINGS_FILE). This module validates and compiles
+that file into a MappingSet and reloads it when the file changes.
 """
+import json
+import os
+import re
+import string
+import threading
+import time
 
-# Resources represent data that can be read or listed
-RESOURCES = {
-    "sites": {
-        "name": "sites",
-        "description": "Network sites in Catalyst Center",
-        "methods": {
-            "list": {
-                "name": "resources/list",
-                "description": "List all network sites",
-                "endpoint": "/dna/intent/api/v1/site",
-                "http_method": "GET"
-            },
-            "read": {
-                "name": "resources/read",
-                "description": "Get details of a specific site",
-                "endpoint": "/dna/intent/api/v1/site/{siteId}",
-                "http_method": "GET"
-            }
-        }
-    },
-    "devices": {
-        "name": "devices",
-        "description": "Network devices in Catalyst Center",
-        "methods": {
-            "list": {
-                "name": "resources/list",
-                "description": "List all network devices",
-                "endpoint": "/dna/intent/api/v1/network-device",
-                "http_method": "GET"
-            },
-            "read": {
-                "name": "resources/read",
-                "description": "Get details of a specific device",
-                "endpoint": "/dna/intent/api/v1/network-device/{deviceId}",
-                "http_method": "GET"
-            }
-        }
-    },
-    "templates": {
-        "name": "templates",
-        "description": "Configuration templates in Catalyst Center",
-        "methods": {
-            "list": {
-                "name": "resources/list",
-                "description": "List all configuration templates",
-                "endpoint": "/dna/intent/api/v1/template-programmer/template",
-                "http_method": "GET"
-            },
-            "read": {
-                "name": "resources/read",
-                "description": "Get details of a specific template",
-                "endpoint": "/dna/intent/api/v1/template-programmer/template/{templateId}",
-                "http_method": "GET"
-            }
-        }
-    }
-}
-
-# Tools represent actions that can be performed
-TOOLS = {
-    "catalyst_api_tool": {
-        "name": "catalyst_api_tool",
-        "description": "Make requests to Catalyst Center API",
-        "parameters": {
-            "http_method": {
-                "type": "string",
-                "enum": ["GET", "POST", "PUT", "DELETE"],
-                "description": "HTTP method for the API request"
-            },
-            "endpoint_path": {
-                "type": "string",
-                "description": "API endpoint path"
-            },
-            "request_params": {
-                "type": "object",
-                "description": "Query parameters for the request"
-            },
-            "request_body": {
-                "type": "object",
-                "description": "Request body for POST/PUT requests"
-            }
-        }
-    },
-    "deploy_template": {
-        "name": "deploy_template",
-        "description": "Deploy a configuration template to devices",
-        "parameters": {
-            "templateId": {
-                "type": "string",
-                "description": "ID of the template to deploy"
-            },
-            "deviceIds": {
-                "type": "array",
-                "items": {"type": "string"},
-                "description": "List of device IDs to deploy the template to"
-            }
+MAPPINGS_FILE = os.getenv("MCP_MAPPINGS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_mappings.json"))
+
+# Minimum seconds between checks of the mappings file for changes
+MAPPINGS_RELOAD_INTERVAL = float(os.getenv("MCP_MAPPINGS_RELOAD_INTERVAL", "5"))
+
+# Matches /mcp/resource/<name> and /mcp/resource/<name>/<id>
+RESOURCE_URI_PATTERN = re.compile(r"^/?mcp/resource/(?P<name>[^/]+)(?:/(?P<id>[^/]+))?/?$")
+
+# Methods CatalystClient can send
+HTTP_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+class MappingError(Exception):
+    pass
+
+class EndpointTemplate:
+    """A Catalyst endpoint with a single {placeholder}, split once so building a URL is a concatenation."""
+    __slots__ = ("template", "placeholder", "_prefix", "_suffix")
+
+    def __init__(self, template):
+        fields = [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
+        if len(fields) != 1 or not fields[0].isidentifier():
+            raise MappingError(f"Endpoint {template!r} must contain exactly one {{name}} placeholder")
+        self.template = template
+        self.placeholder = fields[0]
+        self._prefix, self._suffix = template.split("{" + self.placeholder + "}")
+
+    def build(self, value):
+        return f"{self._prefix}{value}{self._suffix}"
+
+class MappingSet:
+    """An immutable, compiled snapshot of the MCP mappings.
+    Requests keep using the snapshot they started with, so a reload never affects in-flight work."""
+
+    def __init__(self, resources, tools, prompts):
+        self.resources = resources
+        self.tools = tools
+        self.prompts = prompts
+        # Read endpoint builders per resource, validated at load time
+        self.resource_readers = {
+            name: EndpointTemplate(resource["methods"]["read"]["endpoint"])
+            for name, resource in resources.items()
         }
-    },
-    "provision_device": {
-        "name": "provision_device",
-        "description": "Provision a new device in the network",
-        "parameters": {
-            "deviceInfo": {
-                "type": "object",
-                "description": "Device information for provisioning"
-            },
-            "siteId": {
-                "type": "string",
-                "description": "ID of the site to provision the device in"
+        # Precomputed catalogs for the */list methods
+        self.tools_catalog = [
+            {
+                "id": tool_id,
+                "name": tool_info["name"],
+                "description": tool_info["description"],
+                "parameters": tool_info["parameters"]
             }
-        }
-    }
-}
-
-# Prompts represent predefined interactions or workflows
-PROMPTS = {
-    "device_onboarding": {
-        "name": "device_onboarding",
-        "description": "Guide through the process of onboarding a new device",
-        "steps": [
-            "List available sites",
-            "Select a site for the device",
-            "Enter device details",
-            "Provision the device",
-            "Verify device status"
+            for tool_id, tool_info in tools.items()
         ]
-    },
-    "template_deployment": {
-        "name": "template_deployment",
-        "description": "Guide through deploying a configuration template",
-        "steps": [
-            "List available templates",
-            "Select a template",
-            "List target devices",
-            "Select devices for deployment",
-            "Deploy template",
-            "Verify deployment status"
+        self.resources_catalog = [
+            {
+                "id": resource_id,
+                "name": resource_info["name"],
+                "description": resource_info["description"],
+                "uri": f"/mcp/resource/{resource_id}",
+                "methods": {
+                    method_name: {
+                        "name": method_info["name"],
+                        "description": method_info["description"]
+                    }
+                    for method_name, method_info in resource_info["methods"].items()
+                }
+            }
+            for resource_id, resource_info in resources.items()
         ]
-    },
-    "site_management": {
-        "name": "site_management",
-        "description": "Guide through managing network sites",
-        "steps": [
-            "List all sites",
-            "View site details",
-            "Add new site",
-            "Modify site configuration",
-            "Delete site"
+        self.prompts_catalog = [
+            {
+                "id": prompt_id,
+                "name": prompt_info["name"],
+                "description": prompt_info["description"]
+            }
+            for prompt_id, prompt_info in prompts.items()
         ]
-    }
-}
+
+    def parse_resource_uri(self, uri):
+        """Returns (resource_name, resource_id) for a resource URI, or (None, None) if it does not match."""
+        match = RESOURCE_URI_PATTERN.match(uri)
+        if not match:
+            return None, None
+        return match.group("name"), match.group("id")
+
+def _require(condition, message):
+    if not condition:
+        raise MappingError(message)
+
+def _validate(data):
+    _require(isinstance(data, dict), "Mappings file must contain a JSON object")
+    for section in ("resources", "tools", "prompts"):
+        _require(isinstance(data.get(section), dict), f"Mappings file is missing the {section!r} object")
+
+    for name, resource in data["resources"].items():
+        _require(isinstance(resource, dict) and "name" in resource and "description" in resource, f"Resource {name!r} needs a name and description")
+        methods = resource.get("methods")
+        _require(isinstance(methods, dict), f"Resource {name!r} needs a methods object")
+        for method_name in ("list", "read"):
+            method = methods.get(method_name)
+            _require(isinstance(method, dict), f"Resource {name!r} is missing its {method_name!r} method")
+            for key in ("name", "description", "endpoint", "http_method"):
+                _require(isinstance(method.get(key), str), f"Resource {name!r} {method_name!r} method needs a string {key!r}")
+            _require(method["endpoint"].startswith("/"), f"Resource {name!r} {method_name!r} endpoint must start with '/'")
+            _require(method["http_method"].upper() in HTTP_METHODS, f"Resource {name!r} {method_name!r} http_method must be one of {', '.join(HTTP_METHODS)}")
+
+    for name, tool in data["tools"].items():
+        _require(isinstance(tool, dict) and "name" in tool and "description" in tool, f"Tool {name!r} needs a name and description")
+        _require(isinstance(tool.get("parameters"), dict), f"Tool {name!r} needs a parameters object")
+
+    for name, prompt in data["prompts"].items():
+        _require(isinstance(prompt, dict) and "name" in prompt and "description" in prompt, f"Prompt {name!r} needs a name and description")
+        _require(isinstance(prompt.get("steps"), list), f"Prompt {name!r} needs a steps list")
+
+def load_mappings(path=MAPPINGS_FILE):
+    """Loads, validates and compiles a mappings file. Raises MappingError if it is invalid."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise MappingError(f"Could not read mappings file {path}: {e}") from e
+    _validate(data)
+    return MappingSet(data["resources"], data["tools"], data["prompts"])
+
+_current = load_mappings()
+_loaded_mtime = os.stat(MAPPINGS_FILE).st_mtime
+_next_check = time.monotonic() + MAPPINGS_RELOAD_INTERVAL
+_reload_lock = threading.Lock()
+
+# Module-level views of the current mappings (updated on reload; use current_mappings() for a consistent snapshot)
+RESOURCES = _current.resources
+TOOLS = _current.tools
+PROMPTS = _current.prompts
+
+def reload_mappings():
+    """Reloads the mappings file and swaps it in atomically. Keeps the current mappings if the file is invalid."""
+    global _current, _loaded_mtime, RESOURCES, TOOLS, PROMPTS
+    with _reload_lock:
+        try:
+            mtime = os.stat(MAPPINGS_FILE).st_mtime
+            mappings = load_mappings()
+        except (OSError, MappingError) as e:
+            print(f"Keeping current MCP mappings, reload failed: {e}")
+            return _current
+        _current, _loaded_mtime = mappings, mtime
+        RESOURCES, TOOLS, PROMPTS = mappings.resources, mappings.tools, mappings.prompts
+        print(f"Reloaded MCP mappings from {MAPPINGS_FILE}")
+        return mappings
+
+def current_mappings():
+    """Returns the current MappingSet, reloading it first if the mappings file has changed."""
+    global _next_check
+    now = time.monotonic()
+    if now >= _next_check:
+        _next_check = now + MAPPINGS_RELOAD_INTERVAL
+        try:
+            changed = os.stat(MAPPINGS_FILE).st_mtime != _loaded_mtime
+        except OSError:
+            changed = False
+        if changed:
+            return reload_mappings()
+    return _current
 
 def get_resource_methods(resource_name):
     """Get available methods for a resource."""
-    if resource_name in RESOURCES:
-        return RESOURCES[resource_name]["methods"]
+    resources = current_mappings().resources
+    if resource_name in resources:
+        return resources[resource_name]["methods"]
     return None
 
 def get_tool_parameters(tool_name):
     """Get parameters for a tool."""
-    if tool_name in TOOLS:
-        return TOOLS[tool_name]["parameters"]
+    tools = current_mappings().tools
+    if tool_name in tools:
+        return tools[tool_name]["parameters"]
     return None
 
 def get_prompt_steps(prompt_name):
     """Get steps for a prompt."""
-    if prompt_name in PROMPTS:
-        return PROMPTS[prompt_name]["steps"]
-    return None 
\ No newline at end of file
+    prompts = current_mappings().prompts
+    if prompt_name in prompts:
+        return prompts[prompt_name]["steps"]
+    return None
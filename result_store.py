@@ -0,0 +1,151 @@
+"""
+Bounded stores for the results of idempotent tools/call requests.
+A request claims its idempotency key before running; retries with the same key either wait for
+the original execution or get its stored result. MemoryResultStore is per worker process;
+SqliteResultStore shares results between all workers on a host.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+# Claim outcomes
+CLAIMED = "claimed"      # caller owns the key and must complete() or release() it
+COMPLETED = "completed"  # a stored result is returned
+PENDING = "pending"      # another request with the key is still running
+CONFLICT = "conflict"    # the key was used with different inputs
+
+IDEMPOTENCY_TTL = float(os.getenv("MCP_IDEMPOTENCY_TTL", "3600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("MCP_IDEMPOTENCY_MAX_ENTRIES", "1000"))
+# A pending claim older than this is assumed abandoned (e.g. its worker died) and may be taken over
+IDEMPOTENCY_PENDING_TIMEOUT = float(os.getenv("MCP_IDEMPOTENCY_PENDING_TIMEOUT", "300"))
+
+class MemoryResultStore:
+    def __init__(self, ttl=IDEMPOTENCY_TTL, max_entries=IDEMPOTENCY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> {"fingerprint", "result", "done" (threading.Event), "created_at"}, oldest first
+        self._entries = OrderedDict()
+
+    def _prune(self, now):
+        # Called before a possible insert, so leave room for one new entry
+        excess = len(self._entries) + 1 - self.max_entries
+        for key, entry in list(self._entries.items()):
+            expired = now - entry["created_at"] > self.ttl
+            if not expired and excess <= 0:
+                break  # entries are oldest first, so the rest are fresh too
+            # Never evict a running execution just to make room; skip it and keep scanning
+            if expired or entry["done"].is_set():
+                del self._entries[key]
+                excess -= 1
+
+    def claim(self, key, fingerprint):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = {"fingerprint": fingerprint, "result": None, "done": threading.Event(), "created_at": now}
+                return CLAIMED, None
+            if entry["fingerprint"] != fingerprint:
+                return CONFLICT, None
+            if entry["done"].is_set():
+                return COMPLETED, entry["result"]
+            return PENDING, None
+
+    def complete(self, key, result):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["result"] = result
+                entry["done"].set()
+
+    def release(self, key):
+        """Forgets a claim whose execution failed so that a retry runs it again."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry["done"].set()
+
+    def wait(self, key, timeout):
+        """Waits until the execution holding key finishes. Returns False on timeout."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is None or entry["done"].wait(max(timeout, 0))
+
+class SqliteResultStore:
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, path, ttl=IDEMPOTENCY_TTL, max_entries=IDEMPOTENCY_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_results ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, result TEXT, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level="IMMEDIATE")
+
+    def claim(self, key, fingerprint):
+        # Wall-clock time: rows are shared between processes
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM idempotency_results WHERE created_at < ? OR (result IS NULL AND created_at < ?)",
+                (now - self.ttl, now - IDEMPOTENCY_PENDING_TIMEOUT)
+            )
+            conn.execute(
+                "DELETE FROM idempotency_results WHERE result IS NOT NULL AND key IN ("
+                "SELECT key FROM idempotency_results WHERE result IS NOT NULL ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO idempotency_results (key, fingerprint, result, created_at) VALUES (?, ?, NULL, ?)",
+                (key, fingerprint, now)
+            ).rowcount
+            if inserted:
+                return CLAIMED, None
+            stored_fingerprint, result = conn.execute(
+                "SELECT fingerprint, result FROM idempotency_results WHERE key = ?", (key,)
+            ).fetchone()
+        if stored_fingerprint != fingerprint:
+            return CONFLICT, None
+        if result is not None:
+            return COMPLETED, json.loads(result)
+        return PENDING, None
+
+    def complete(self, key, result):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE idempotency_results SET result = ? WHERE key = ?", (json.dumps(result), key))
+
+    def release(self, key):
+        """Forgets a claim whose execution failed so that a retry runs it again."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM idempotency_results WHERE key = ? AND result IS NULL", (key,))
+
+    def wait(self, key, timeout):
+        """Polls until the execution holding key finishes. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT result IS NOT NULL FROM idempotency_results WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0]:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+
+def create_result_store():
+    """Uses SQLite when MCP_IDEMPOTENCY_DB names a database file, otherwise keeps results in memory."""
+    db_path = os.getenv("MCP_IDEMPOTENCY_DB")
+    if db_path:
+        return SqliteResultStore(db_path)
+    return MemoryResultStore()
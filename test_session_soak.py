@@ -0,0 +1,126 @@
+"""
+Soak test for SSE session lifecycle: churns sessions that close cleanly, get abandoned without
+closing, or are rejected by the per-client and global limits, and checks that active_sessions and
+in_flight_requests stay bounded.
+Run with `python -m pytest test_session_soak.py` or `python test_session_soak.py`.
+"""
+import contextvars
+import gc
+import json
+import time
+import tracemalloc
+
+import app as server
+
+ROUNDS = 15
+MAX_SESSIONS = 12
+MAX_SESSIONS_PER_CLIENT = 5
+IDLE_TIMEOUT = 0.3
+
+class FakeCatalystClient:
+    def __init__(self, deadline=None, cancel_event=None):
+        self.last_response_status_code = None
+
+    def make_request(self, method, endpoint_path, params=None, data=None):
+        self.last_response_status_code = 200
+        return {"response": []}
+
+def _open_session(client, address):
+    """Opens an SSE session and returns (response, session_id, context) after reading the endpoint event.
+
+    A real server runs each stream in its own thread or greenlet. Here many streams stay suspended in
+    one thread, so each keeps its Flask request context in its own contextvars context and must be
+    resumed or closed through it."""
+    context = contextvars.copy_context()
+    response, session_id = context.run(_start_stream, client, address)
+    return response, session_id, context
+
+def _start_stream(client, address):
+    response = client.get("/mcp/sse_session", buffered=False, environ_base={"REMOTE_ADDR": address})
+    if response.status_code != 200:
+        return response, None
+    first_event = next(response.response)
+    if isinstance(first_event, bytes):
+        first_event = first_event.decode("utf-8")
+    endpoint = json.loads(first_event.split("data: ", 1)[1])["endpoint"]
+    return response, endpoint.split("/")[-1]
+
+def _call_tool(client, session_id):
+    return client.post("/mcp/sse_session", json={
+        "endpoint": f"http://localhost:5001/mcp/session/{session_id}",
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"toolId": "catalyst_api_tool", "inputs": {"http_method": "GET", "endpoint_path": "/dna/intent/api/v1/site"}}
+    })
+
+def _churn_round(client, round_number):
+    """Fills the server past both limits, then closes half the sessions and abandons the rest."""
+    opened = []
+    rejected = {429: 0, 503: 0}
+    # One client asks for more than its share: MAX_SESSIONS_PER_CLIENT succeed, the rest get 429.
+    # The other clients then fill the global limit, and the last one is turned away with 503.
+    attempts = (
+        [f"10.{round_number}.0.1"] * (MAX_SESSIONS_PER_CLIENT + 2)
+        + [f"10.{round_number}.0.2"] * MAX_SESSIONS_PER_CLIENT
+        + [f"10.{round_number}.0.3"] * (MAX_SESSIONS - 2 * MAX_SESSIONS_PER_CLIENT)
+        + [f"10.{round_number}.0.4"] * 3
+    )
+    for address in attempts:
+        response, session_id, context = _open_session(client, address)
+        if session_id is None:
+            rejected[response.status_code] += 1
+            continue
+        assert _call_tool(client, session_id).status_code == 200
+        opened.append((response, session_id, context))
+        assert len(server.active_sessions) <= MAX_SESSIONS
+    assert rejected == {429: 2, 503: 3}
+    assert len(server.active_sessions) == MAX_SESSIONS
+
+    abandoned = []
+    for i, (response, session_id, context) in enumerate(opened):
+        if i % 2:
+            context.run(response.close)  # clean disconnect right after the handshake
+            assert session_id not in server.active_sessions
+        else:
+            abandoned.append((response, context))  # client vanished without the worker noticing
+    return abandoned
+
+def test_session_churn_stays_bounded(monkeypatch):
+    monkeypatch.setattr(server, "CatalystClient", FakeCatalystClient)
+    monkeypatch.setattr(server, "MCP_SESSION_IDLE_TIMEOUT", IDLE_TIMEOUT)
+    monkeypatch.setattr(server, "MCP_MAX_SESSIONS", MAX_SESSIONS)
+    monkeypatch.setattr(server, "MCP_MAX_SESSIONS_PER_CLIENT", MAX_SESSIONS_PER_CLIENT)
+    server.active_sessions.clear()
+    client = server.app.test_client()
+
+    tracemalloc.start()
+    try:
+        abandoned = []
+        baseline = None
+        for round_number in range(ROUNDS):
+            abandoned.extend(_churn_round(client, round_number))
+            assert not server.in_flight_requests
+            # Let abandoned sessions go idle; the next session opened reaps them
+            time.sleep(IDLE_TIMEOUT + 0.1)
+            if round_number == 4:
+                gc.collect()
+                baseline = tracemalloc.get_traced_memory()[0]
+        server.reap_idle_sessions()
+        assert not server.active_sessions
+        assert not server.in_flight_requests
+
+        # The reaped streams' generators are finally closed, as the server would on a write error
+        for response, context in abandoned:
+            context.run(response.close)
+        del abandoned
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - baseline
+        assert growth < 1024 * 1024, f"memory grew by {growth} bytes under session churn"
+    finally:
+        tracemalloc.stop()
+        server.active_sessions.clear()
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))